@@ -1,6 +1,4 @@
 import sys
-from src.trello import TrelloAPI
+from src.trello import TrelloCLI
 
-trello = TrelloAPI(sys.argv[1:])
-
-trello.run()
+TrelloCLI.main(sys.argv[1:])
@@ -6,39 +6,154 @@ and story points for each of them.
 """
 
 import argparse
-from typing import Optional, Any
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, TYPE_CHECKING
 import datetime
+from functools import cached_property, lru_cache
+import hashlib
+import json
 from itertools import chain
+import os
+from operator import itemgetter
+from pathlib import Path
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# httpx is required only for concurrent requests of `monday` method
+if TYPE_CHECKING:
+    import httpx
+
+try:
+    from orjson import loads as load_json
+except ImportError:
+    from json import loads as load_json
 
 
 # Credentials
 CREDENTIALS = f'key={API_KEY}&token={API_TOKEN}'
 
+# Board's lists in order of appearance in report
+LIST_IDS = {
+    'In progress': IN_PROGRESS_LIST_ID,
+    'Waiting for customer': WAITING_LIST_ID,
+    'Testing': TESTING_LIST_ID,
+    'Done': DONE_LIST_ID
+}
+
+# Limit of simultaneous requests to respect Trello API rate limits
+MAX_PARALLEL_REQUESTS = 10
+
+# Failed requests are retried with exponentially growing delay
+RETRIES = 3
+RETRY_BACKOFF = 0.3
+
+# Status code of request failed without response
+NO_RESPONSE = 0
+
+# Board and lists metadata rarely changes, so responses are cached on disk
+CACHE_DIR = Path.home() / '.cache' / 'trello-helper'
+CACHE_TTL = 60
+
+# Only JSON responses are expected from Trello API
+HEADERS = {'Accept': 'application/json'}
+
+
+@dataclass
+class Card():
+    """Ticket's card on board."""
+
+    # `dataclass(slots=True)` requires Python 3.10
+    __slots__ = ('id', 'name', 'points')
+
+    id: str
+    name: str
+    points: int
+
 
 class TrelloAPI():
-    def __init__(self, args, api_key=API_KEY, api_token=API_TOKEN):
-        self.args = TrelloAPI.parse_arguments(args)
+    def __init__(self, api_key=API_KEY, api_token=API_TOKEN):
         self.api_key = api_key
         self.api_token = api_token
-        self.tickets = self.get_tickets_information()
+        self._session = TrelloAPI.create_session()
+
+    @cached_property
+    def tickets(self) -> dict[str, tuple[Card]]:
+        """Board's tickets, fetched on first access."""
+
+        return self.get_tickets_information()
 
-    def get_list_cards(self, list_id: str) -> Optional[tuple[dict[str, str]]]:
+    @cached_property
+    def _name_to_id(self) -> dict[str, str]:
+        name_to_id = {}
+        # First card with the same name in lists order is used
+        for card in chain.from_iterable(self.tickets.values()):
+            name_to_id.setdefault(card.name, card.id)
+
+        return name_to_id
+
+    def get_all_board_cards(self) -> list[dict[str, Any]]:
         """
-        Retrieve tuple of dictionaries,
-        containing `card's ID, ticket's name and ticket's story point`.
+        Retrieve all open cards on board,
+        containing `card's ID, name, ID of its list and position in it`.
         """
 
-        response = requests.get(
-            f'{URL}lists/{list_id}/cards?fields=name&{CREDENTIALS}')
+        response = self._session.get(
+            f'{URL}boards/{HOTELS_BOARD_ID}/cards?fields=name,idList,pos&{CREDENTIALS}')
 
         if response.status_code != 200:
-            print('Could not get list of done tickets')
-            return
+            print('Could not get list of board cards')
+            return []
+
+        return load_json(response.content)
 
-        return tuple(
-            TrelloAPI.parse_card_name(card)
-            for card in response.json()
+    @staticmethod
+    def create_session() -> requests.Session:
+        """
+        Create session reusing connections to Trello API between requests.
+
+        Failed requests are retried on connection errors, rate limiting
+        and server errors.
+        """
+
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=RETRIES,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # Last response is returned to the caller's status checks
+                raise_on_status=False
+            )
+        ))
+
+        return session
+
+    @staticmethod
+    def create_async_client() -> 'httpx.AsyncClient':
+        """
+        Create asynchronous client for concurrent requests to Trello API.
+
+        Concurrent requests are multiplexed over a single HTTP/2 connection.
+        Failed connections are retried.
+        """
+
+        import httpx
+
+        return httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                retries=RETRIES
+            )
         )
 
     def show_board(self) -> None:
@@ -48,88 +163,125 @@ class TrelloAPI():
         for list_title in self.tickets:
             self.show_list_tickets(list_title)
 
-    @staticmethod
+    def get_cached_json(self, url: str) -> Any:
+        """
+        Return JSON body of response for `url`.
+
+        Cached body is reused until it becomes stale.
+        If Trello API can not be reached, stale body is returned instead.
+        """
+
+        cache_file = CACHE_DIR / f'{hashlib.sha256(url.encode()).hexdigest()}.json'
+
+        try:
+            cached = load_json(cache_file.read_bytes())
+        except (OSError, ValueError):
+            cached = None
+
+        if cached and time.time() < cached['stale_at']:
+            return cached['body']
+
+        try:
+            response = self._session.get(url)
+            response.raise_for_status()
+        except requests.RequestException:
+            if not cached:
+                raise
+            return cached['body']
+
+        body = load_json(response.content)
+        generated_at = time.time()
+
+        # Cache is only an optimization, so body is returned even if not cached
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Replace cache file at once, so other processes never read it half-written
+            temporary_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+            temporary_file.write_text(json.dumps({
+                'generated_at': generated_at,
+                'stale_at': generated_at + CACHE_TTL,
+                'body': body
+            }))
+            temporary_file.replace(cache_file)
+        except OSError:
+            pass
+
+        return body
+
     def get_board_information(
-            board_id: str = HOTELS_BOARD_ID) -> dict[str, Any]:
-        """Return board information, containing its `ID, name and etc."""
+            self, board_id: str = HOTELS_BOARD_ID,
+            fields: str = 'id,name,closed,shortUrl,url') -> dict[str, Any]:
+        """
+        Return board information, containing its `ID, name and etc.
 
-        return requests.get(
-            f'{URL}boards/{board_id}?fields=id,name,closed,desc,shortUrl,url&{CREDENTIALS}'
-        ).json()
+        Large fields like `desc` are requested only if passed in `fields`.
+        """
 
-    @staticmethod
-    def get_lists_information() -> list[dict[str, str]]:
+        return self.get_cached_json(
+            f'{URL}boards/{board_id}?fields={fields}&{CREDENTIALS}'
+        )
+
+    def get_lists_information(self) -> list[dict[str, str]]:
         """Return lists information, containing their `ID and name.`"""
 
-        return requests.get(
+        return self.get_cached_json(
             f'{URL}boards/{HOTELS_BOARD_ID}/lists?fields=name&{CREDENTIALS}'
-        ).json()
+        )
 
     def show_list_tickets(self, list_name: str) -> None:
         """Get list of tickets with its story points."""
 
-        if list_name not in (
-            'In progress', 'Waiting for customer', 'Testing', 'Done'):
-
+        if list_name not in LIST_IDS:
             print(f'List {list_name} not found on current board')
             return
 
         print(list_name)
 
-        start = 0
+        tickets = self.tickets[list_name]
         if list_name == 'Done':
-            start = 1
             print('  - All - contains list of all done tickets')
+            tickets = self.get_done_tickets()
 
-        for ticket in self.tickets[list_name][start:]:
-            print(f"  - {ticket['name']} - {ticket['story points']} points")
+        for ticket in tickets:
+            print(f'  - {ticket.name} - {ticket.points} points')
 
     @staticmethod
-    def parse_card_name(card: dict[str, str]) -> dict[str, str]:
+    def parse_card_name(card: dict[str, str]) -> Card:
         """
         Get ticket's name and story points per each card
         from card's name and ID.
         """
 
-        if not card['name']:
-            return {'id': '', 'name': '', 'story points': '0'}
-
         # Only such cards are permitted.
         cards_name = card['name'].split()
 
-        points = '0'
-        if len(cards_name) > 1:
-            try:
-                isinstance(int(cards_name[-1]), str)
-            except ValueError:
-                points = '0'
-            else:
-                points = cards_name[-1]
+        if not cards_name:
+            return Card(id='', name='', points=0)
 
-        return {
-            'id': card['id'],
-            'name': cards_name[0],
-            'story points': points
-        }
+        points = 0
+        # `isdecimal` accepts only strings convertible by `int`
+        if len(cards_name) > 1 and cards_name[-1].isdecimal():
+            points = int(cards_name[-1])
+
+        return Card(id=card['id'], name=cards_name[0], points=points)
 
     def delete_card(self, card_name: str) -> int:
         """Remove card from board using `card name`."""
 
-        card_id = self.get_card_id(card_name) or self.get_card_id(card_name.split()[0])
+        card_id = self.get_card_id(card_name, card_name.split()[0])
 
-        status_code = requests.delete(
+        status_code = self._session.delete(
             url=f'{URL}/cards/{card_id}?{CREDENTIALS}',
         ).status_code
 
         return status_code
 
-    @staticmethod
-    def create_card(card_name: str, list_name: str) -> int:
+    def create_card(self, card_name: str, list_name: str) -> int:
         """Create card with specific name onto specified list."""
 
         list_id = TrelloAPI.get_list_id(list_name)
 
-        status_code = requests.post(
+        status_code = self._session.post(
             url=f'{URL}lists/{list_id}/cards?{CREDENTIALS}',
             data={'name': card_name}
         ).status_code
@@ -139,25 +291,15 @@ class TrelloAPI():
     def move_card(self, full_card_name: str, list_name: str) -> int:
         """Move card from one list to another one on the same board."""
 
-        card_id = self.get_card_id(full_card_name)
-        if card_id:
-            # if move card only by it's `name`, without `story points`
-            # `story points` are not saved
-            for card in chain(*self.tickets.values()):
-                if card['id'] == card_id:
-                    card_name = f"{card['name']} - {card['story points']}"
-                    break
-            else:
-                card_name = full_card_name
-        else:
-            card_name = full_card_name.split()[0]
+        card_id = self.get_card_id(full_card_name, full_card_name.split()[0])
 
-        if (
-                self.delete_card(card_name) == 200 and
-                TrelloAPI.create_card(card_name, list_name) == 200
-        ):
-            return 200
-        return 400
+        # Card keeps its name, comments and history
+        response = self._session.put(
+            url=f'{URL}cards/{card_id}?{CREDENTIALS}',
+            data={'idList': TrelloAPI.get_list_id(list_name)}
+        )
+
+        return response.status_code
 
     def update_card(self, full_card_name: str, new_name: str) -> int:
         """
@@ -166,34 +308,46 @@ class TrelloAPI():
         """
 
         # * This method could be converted to update any card's field
-        card_id = self.get_card_id(full_card_name) or self.get_card_id(full_card_name.split()[0])
+        card_id = self.get_card_id(full_card_name, full_card_name.split()[0])
 
-        response = requests.put(
+        response = self._session.put(
             url=f'{URL}cards/{card_id}?{CREDENTIALS}',
             data={'name': new_name}
         )
 
         return response.status_code
 
-    def get_tickets_information(self) -> dict[str, Optional[tuple[dict[str, str]]]]:
+    def get_tickets_information(self) -> dict[str, tuple[Card]]:
         """
         Retrive all necessary information about current situation on board
         to create report template.
+
+        Cards of all lists are fetched by single request and grouped by list.
         """
 
+        lists_cards = defaultdict(list)
+        # Keep cards in the same order as on board
+        for card in sorted(self.get_all_board_cards(), key=itemgetter('pos')):
+            lists_cards[card['idList']].append(TrelloAPI.parse_card_name(card))
+
         return {
-            'In progress': self.get_list_cards(IN_PROGRESS_LIST_ID),
-            'Waiting for customer': self.get_list_cards(WAITING_LIST_ID),
-            'Testing': self.get_list_cards(TESTING_LIST_ID),
-            'Done': self.get_list_cards(DONE_LIST_ID)
+            list_name: tuple(lists_cards[list_id])
+            for list_name, list_id in LIST_IDS.items()
         }
 
     @staticmethod
     def get_week() -> str:
         """Get week's start and week's end dates."""
 
+        return TrelloAPI.get_week_for(datetime.date.today().toordinal())
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_week_for(ordinal: int) -> str:
+        """Get week's start and week's end dates for day's `ordinal`."""
+
         # ! Week might be not full or it can contain holidays
-        today = datetime.datetime.today()
+        today = datetime.date.fromordinal(ordinal)
         # If today is not Monday then use day difference
         # Between today and Monday
         # Otherwise use previous Monday date
@@ -207,38 +361,151 @@ class TrelloAPI():
         """Create weekly report template."""
 
         # Previous week on report's top
-        template = [f'{TrelloAPI.get_week()}:\n\n', ]
+        template = [f'{TrelloAPI.get_week()}:\n']
 
-        for tickets_list in self.tickets:
-            template.append(f'{tickets_list}:\n')
+        for tickets_list, tickets in self.tickets.items():
+            template.append(f'{tickets_list}:')
+            # `All` card contains previously done tickets
             template.extend(
-                f"  - {JIRA_URL}{ticket['name']} - {ticket['story points']} points\n"
-                for ticket in self.tickets[tickets_list]
+                f'  - {JIRA_URL}{ticket.name} - {ticket.points} points'
+                for ticket in tickets
+                if ticket.id != ALL_DONE_TICKETS_CARD_ID
             )
 
-        template.remove('  - https://gojira.skyscanner.net/browse/All - 0 points\n')
-        template.append(f'SP per week: {self.get_weekly_story_points()}\n')
+        template.append(f'SP per week: {self.get_weekly_story_points()}')
+
+        return '\n'.join(template)
+
+    def get_done_tickets(self) -> list[Card]:
+        """Return recently done tickets from `Done` list except `All` card."""
+
+        return [
+            ticket for ticket in self.tickets['Done']
+            if ticket.id != ALL_DONE_TICKETS_CARD_ID
+        ]
+
+    def get_weekly_story_points(self) -> int:
+        """Return sum of story points of recently done tickets."""
+
+        return sum(card.points for card in self.get_done_tickets())
+
+    @staticmethod
+    async def send_request(
+            client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore,
+            method: str, url: str, **kwargs) -> int:
+        """
+        Send request once semaphore allows it and return its status code.
+
+        Rate limited requests are retried after delay requested by Trello API.
+        If request fails without response, `NO_RESPONSE` is returned.
+        """
+
+        import httpx
+
+        for attempt in range(RETRIES + 1):
+            try:
+                async with semaphore:
+                    response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError as error:
+                print(f'{method} request failed with {type(error).__name__}')
+                return NO_RESPONSE
+
+            if response.status_code != 429 or attempt == RETRIES:
+                break
+
+            try:
+                delay = float(response.headers['Retry-After'])
+            except (KeyError, ValueError):
+                delay = RETRY_BACKOFF * 2 ** attempt
+
+            await asyncio.sleep(delay)
 
-        # TODO: '\n'.join(template) instead of current version
-        return ''.join(template)
+        return response.status_code
 
-    def get_weekly_story_points(self):
-        return sum(int(card['story points']) for card in self.get_list_cards(DONE_LIST_ID)[1:])
+    async def archive_done_card(
+            self, client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore,
+            ticket: Card) -> tuple[Card, str, int]:
+        """
+        Move done card's name to `All` card's comments
+        and delete it from `Done` list.
+
+        Card is deleted only if comment has been added.
+        Return ticket, last performed operation and its status code.
+        """
+
+        status_code = await TrelloAPI.send_request(
+            client, semaphore, 'POST',
+            f'{URL}cards/{ALL_DONE_TICKETS_CARD_ID}/actions/comments?{CREDENTIALS}',
+            data={'text': f'{ticket.name} - {ticket.points}'}
+        )
+        if status_code != 200:
+            return ticket, 'comment', status_code
+
+        status_code = await TrelloAPI.send_request(
+            client, semaphore, 'DELETE',
+            f'{URL}cards/{ticket.id}?{CREDENTIALS}'
+        )
 
-    def move_cards_name_to_comments(self) -> int:
-        """Move previously done cards to `All` card on `Done` list."""
+        return ticket, 'delete', status_code
 
-        # First ticket in `Done` list is skipped
+    async def archive_done_cards(self) -> None:
+        """
+        Move recently done cards to `All` card's comments
+        and delete them from `Done` list.
+
+        Cards are archived concurrently, each one as soon as its comment is added.
+        """
+
+        # `All` card is skipped
         # Because done ticket are moved into it.
-        for ticket in self.tickets['Done'][1:]:
-            status_code = requests.post(
-                url=f'{URL}cards/{ALL_DONE_TICKETS_CARD_ID}/actions/comments?{CREDENTIALS}',
-                data={'text': f"{ticket['name']} - {ticket['story points']}"}
-            ).status_code
-            if status_code != 200:
-                return status_code
+        done_tickets = self.get_done_tickets()
+        if not done_tickets:
+            print('There are no recently done cards to archive.')
+            return
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+
+        async with TrelloAPI.create_async_client() as client:
+            results = await asyncio.gather(*(
+                self.archive_done_card(client, semaphore, ticket)
+                for ticket in done_tickets
+            ))
+
+        failed = [result for result in results if result[2] != 200]
+        if failed:
+            print('Failed to archive recently done cards:')
+            for ticket, operation, status_code in failed:
+                reason = f'{status_code} error' if status_code else 'no response'
+                # Commented but not deleted card will be commented again on next run
+                commented = 'comment added, ' if operation == 'delete' else ''
+                print(f'  - {ticket.name} - {commented}{operation} failed with {reason}')
+            print()
+            return
+
+        print('Recently done cards has been successfully archived.')
+
+    def get_card_id(self, *card_names: str) -> str:
+        """Return ID of the first card found by one of `card names`."""
 
-        return 200
+        for card_name in card_names:
+            card_id = self._name_to_id.get(card_name)
+            if card_id:
+                return card_id
+
+        return ''
+
+    @staticmethod
+    def get_list_id(list_name: str) -> str:
+        """Return list ID by list's name."""
+
+        return LIST_IDS.get(list_name, '')
+
+
+class TrelloCLI():
+    """Command line interface for `TrelloAPI`."""
+
+    def __init__(self, api: TrelloAPI):
+        self.api = api
 
     @staticmethod
     def parse_arguments(args: list[str]) -> argparse.Namespace():
@@ -268,45 +535,58 @@ class TrelloAPI():
 
         return argument_parser.parse_args(args)
 
-    def run(self) -> None:
+    @staticmethod
+    def main(args: list[str]) -> None:
         """Run specified method with specified arguments."""
 
-        if self.args.method == 'monday':
-            print(self.create_letter_template())
-
-            move_cards_status_code = self.move_cards_name_to_comments()
-            if move_cards_status_code != 200:
-                print("Failed to move recently done cards to `All' comments\n")
-                return
-
-            for card in self.tickets['Done'][1:]:
-                status_code = self.delete_card(card['name'])
-                if status_code != 200:
-                    print(f"Failed to delete card {card['name']}\n")
-                    return
-
-            print('Recently done cards has been successfully archived.')
-
-        elif self.args.method == 'show_board':
-            self.show_board()
-        elif self.args.method == 'show_list':
-            self.show_list_tickets(self.args.arg1)
-
-        elif self.args.method == 'create_card':
-            status_code = TrelloAPI.create_card(self.args.arg1, self.args.arg2)
-            TrelloAPI.show_reply(status_code, 'create')
-        elif self.args.method == 'delete_card':
-            status_code = self.delete_card(self.args.arg1)
-            TrelloAPI.show_reply(status_code, 'delete')
-        elif self.args.method == 'move_card':
-            status_code = self.move_card(self.args.arg1, self.args.arg2)
-            TrelloAPI.show_reply(status_code, 'move')
-        elif self.args.method == 'update_card':
-            status_code = self.update_card(self.args.arg1, self.args.arg2)
-            TrelloAPI.show_reply(status_code, 'update')
+        arguments = TrelloCLI.parse_arguments(args)
 
-        else:
+        handler = TrelloCLI.METHODS.get(arguments.method)
+        if handler is None:
             print('There is no method with such name')
+            return
+
+        handler(TrelloCLI(TrelloAPI()), arguments.arg1, arguments.arg2)
+
+    def run_monday(self, *_) -> None:
+        """Print report template and archive recently done cards."""
+
+        # `All` card is always on board, so no cards means they were not fetched
+        if not any(self.api.tickets.values()):
+            return
+
+        print(self.api.create_letter_template())
+        asyncio.run(self.api.archive_done_cards())
+
+    def run_show_board(self, *_) -> None:
+        """Show all board's lists."""
+
+        self.api.show_board()
+
+    def run_show_list(self, list_name: str, _) -> None:
+        """Show tickets of specified list."""
+
+        self.api.show_list_tickets(list_name)
+
+    def run_create_card(self, card_name: str, list_name: str) -> None:
+        """Create card and show operation status."""
+
+        TrelloCLI.show_reply(self.api.create_card(card_name, list_name), 'create')
+
+    def run_delete_card(self, card_name: str, _) -> None:
+        """Delete card and show operation status."""
+
+        TrelloCLI.show_reply(self.api.delete_card(card_name), 'delete')
+
+    def run_move_card(self, card_name: str, list_name: str) -> None:
+        """Move card and show operation status."""
+
+        TrelloCLI.show_reply(self.api.move_card(card_name, list_name), 'move')
+
+    def run_update_card(self, card_name: str, new_name: str) -> None:
+        """Update card and show operation status."""
+
+        TrelloCLI.show_reply(self.api.update_card(card_name, new_name), 'update')
 
     @staticmethod
     def show_reply(status_code: int, operation: str) -> None:
@@ -324,26 +604,13 @@ class TrelloAPI():
                 f"Operation failed with {status_code} error."
             )
 
-    def get_card_id(self, card_name: str) -> str:
-        """Return card ID by it's name."""
-
-        for card in chain(*self.tickets.values()):
-            if card['name'] == card_name:
-                return card['id']
-
-        return ''
-
-    @staticmethod
-    def get_list_id(list_name: str) -> str:
-        """Return list ID by list's name."""
-
-        if list_name == 'In progress':
-            return IN_PROGRESS_LIST_ID
-        if list_name == 'Testing':
-            return TESTING_LIST_ID
-        if list_name == 'Waiting for customer':
-            return WAITING_LIST_ID
-        if list_name == 'Done':
-            return DONE_LIST_ID
-
-        return ''
+    # Command line methods and their handlers
+    METHODS = {
+        'monday': run_monday,
+        'show_board': run_show_board,
+        'show_list': run_show_list,
+        'create_card': run_create_card,
+        'delete_card': run_delete_card,
+        'move_card': run_move_card,
+        'update_card': run_update_card
+    }
@@ -0,0 +1,370 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import time
+from unittest.mock import Mock
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+import requests
+
+from src import trello
+from src.trello import TrelloAPI
+
+
+URL = 'https://api.trello.com/1/boards/board?fields=name'
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(trello, 'CACHE_DIR', tmp_path)
+
+    api = TrelloAPI()
+    api._session = Mock()
+
+    return api
+
+
+def write_cache(cache_dir, url, body, stale_at):
+    cache_file = cache_dir / f'{hashlib.sha256(url.encode()).hexdigest()}.json'
+    cache_file.write_text(json.dumps({
+        'generated_at': stale_at - trello.CACHE_TTL,
+        'stale_at': stale_at,
+        'body': body
+    }))
+
+    return cache_file
+
+
+def test_get_cached_json_requests_and_caches_body(api, tmp_path):
+    api._session.get.return_value = Mock(content=b'{"name": "Hotels"}')
+
+    assert api.get_cached_json(URL) == {'name': 'Hotels'}
+    assert api.get_cached_json(URL) == {'name': 'Hotels'}
+    api._session.get.assert_called_once_with(URL)
+
+
+def test_get_cached_json_leaves_only_cache_file(api, tmp_path):
+    api._session.get.return_value = Mock(content=b'{"name": "Hotels"}')
+
+    api.get_cached_json(URL)
+
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.json']
+
+
+def test_get_cached_json_returns_body_if_cache_is_not_writable(
+        api, tmp_path, monkeypatch):
+    # Cache directory can not be created over existing file
+    cache_dir = tmp_path / 'cache'
+    cache_dir.write_text('')
+    monkeypatch.setattr(trello, 'CACHE_DIR', cache_dir)
+    api._session.get.return_value = Mock(content=b'{"name": "Hotels"}')
+
+    assert api.get_cached_json(URL) == {'name': 'Hotels'}
+
+
+def test_get_cached_json_returns_fresh_body(api, tmp_path):
+    write_cache(tmp_path, URL, {'name': 'Cached'}, time.time() + 60)
+
+    assert api.get_cached_json(URL) == {'name': 'Cached'}
+    api._session.get.assert_not_called()
+
+
+def test_get_cached_json_refreshes_stale_body(api, tmp_path):
+    cache_file = write_cache(tmp_path, URL, {'name': 'Stale'}, time.time() - 1)
+    api._session.get.return_value = Mock(content=b'{"name": "Hotels"}')
+
+    assert api.get_cached_json(URL) == {'name': 'Hotels'}
+    assert json.loads(cache_file.read_text())['body'] == {'name': 'Hotels'}
+
+
+def test_get_cached_json_returns_stale_body_if_unreachable(api, tmp_path):
+    write_cache(tmp_path, URL, {'name': 'Stale'}, time.time() - 1)
+    api._session.get.side_effect = requests.ConnectionError
+
+    assert api.get_cached_json(URL) == {'name': 'Stale'}
+
+
+def test_get_cached_json_returns_stale_body_on_error_status(api, tmp_path):
+    write_cache(tmp_path, URL, {'name': 'Stale'}, time.time() - 1)
+    api._session.get.return_value.raise_for_status.side_effect = requests.HTTPError
+
+    assert api.get_cached_json(URL) == {'name': 'Stale'}
+
+
+def test_get_cached_json_raises_if_unreachable_without_cache(api):
+    api._session.get.side_effect = requests.ConnectionError
+
+    with pytest.raises(requests.ConnectionError):
+        api.get_cached_json(URL)
+
+
+def board_card(card_id, name, list_id, pos):
+    return {'id': card_id, 'name': name, 'idList': list_id, 'pos': pos}
+
+
+def test_get_tickets_information_groups_cards_by_list(api):
+    api._session.get.return_value = Mock(status_code=200, content=json.dumps([
+        board_card('2', 'T-2 3', trello.DONE_LIST_ID, 2),
+        board_card(trello.ALL_DONE_TICKETS_CARD_ID, 'All', trello.DONE_LIST_ID, 1),
+        board_card('3', 'T-3', trello.IN_PROGRESS_LIST_ID, 5),
+        board_card('4', 'T-4', 'unknown list', 1),
+    ]).encode())
+
+    assert api.get_tickets_information() == {
+        'In progress': (trello.Card('3', 'T-3', 0),),
+        'Waiting for customer': (),
+        'Testing': (),
+        'Done': (
+            trello.Card(trello.ALL_DONE_TICKETS_CARD_ID, 'All', 0),
+            trello.Card('2', 'T-2', 3),
+        ),
+    }
+
+
+def test_get_done_tickets_skips_all_card_by_id(api):
+    api.tickets = {'Done': (
+        trello.Card('2', 'T-2', 3),
+        trello.Card(trello.ALL_DONE_TICKETS_CARD_ID, 'All', 0),
+        trello.Card('4', 'T-4', 5),
+    )}
+
+    assert api.get_done_tickets() == [
+        trello.Card('2', 'T-2', 3),
+        trello.Card('4', 'T-4', 5),
+    ]
+    assert api.get_weekly_story_points() == 8
+
+
+def test_get_tickets_information_returns_empty_lists_on_error(api):
+    api._session.get.return_value = Mock(status_code=500)
+
+    assert api.get_tickets_information() == dict.fromkeys(trello.LIST_IDS, ())
+
+
+def test_get_card_id_returns_first_card_with_same_name(api):
+    api.tickets = {
+        'In progress': (trello.Card('1', 'T-1', 0),),
+        'Done': (trello.Card('2', 'T-1', 3),),
+    }
+
+    assert api.get_card_id('T-1') == '1'
+
+
+def test_create_letter_template_skips_only_all_card(api):
+    api.tickets = {
+        'In progress': (trello.Card('1', 'T-1', 0),),
+        'Done': (
+            trello.Card(trello.ALL_DONE_TICKETS_CARD_ID, 'All', 0),
+            trello.Card('2', 'All', 2),
+            trello.Card('3', 'T-3', 3),
+        ),
+    }
+
+    assert api.create_letter_template().splitlines()[2:] == [
+        'In progress:',
+        f'  - {trello.JIRA_URL}T-1 - 0 points',
+        'Done:',
+        f'  - {trello.JIRA_URL}All - 2 points',
+        f'  - {trello.JIRA_URL}T-3 - 3 points',
+        'SP per week: 5',
+    ]
+
+
+def test_card_has_no_instance_dict():
+    assert not hasattr(trello.Card('1', 'T-1', 0), '__dict__')
+
+
+def send_request(monkeypatch, responses):
+    """Send request answered by `responses` and return status code and delays."""
+
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await TrelloAPI.send_request(
+                client, asyncio.Semaphore(1), 'GET', URL)
+
+    monkeypatch.setattr(trello.asyncio, 'sleep', sleep)
+
+    return asyncio.run(send()), delays
+
+
+def test_send_request_waits_for_retry_after(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={'Retry-After': '2'}),
+        httpx.Response(200),
+    ]
+
+    assert send_request(monkeypatch, responses) == (200, [2.0])
+
+
+def test_send_request_backs_off_without_retry_after(monkeypatch):
+    responses = [httpx.Response(429), httpx.Response(429), httpx.Response(200)]
+
+    status_code, delays = send_request(monkeypatch, responses)
+
+    assert status_code == 200
+    assert delays == [trello.RETRY_BACKOFF, trello.RETRY_BACKOFF * 2]
+
+
+def test_send_request_gives_up_after_retries(monkeypatch):
+    responses = [httpx.Response(429) for _ in range(trello.RETRIES + 2)]
+
+    status_code, delays = send_request(monkeypatch, responses)
+
+    assert status_code == 429
+    assert len(delays) == trello.RETRIES
+    assert len(responses) == 1
+
+
+def test_send_request_does_not_retry_server_errors(monkeypatch):
+    responses = [httpx.Response(500), httpx.Response(200)]
+
+    assert send_request(monkeypatch, responses) == (500, [])
+
+
+def test_send_request_returns_no_response_on_error(monkeypatch):
+    responses = [httpx.ReadTimeout('timeout')]
+
+    assert send_request(monkeypatch, responses) == (trello.NO_RESPONSE, [])
+
+
+@pytest.fixture
+def trello_requests(monkeypatch):
+    """Record archiving requests answered with status codes of `failures`."""
+
+    sent = []
+    failures = {}
+
+    def handler(request):
+        if request.method == 'POST':
+            text = parse_qs(request.content.decode())['text'][0]
+            name = text.split()[0]
+        else:
+            name = request.url.path.rsplit('/', 1)[-1]
+        sent.append((request.method, name))
+
+        return httpx.Response(failures.get((request.method, name), 200))
+
+    monkeypatch.setattr(
+        TrelloAPI, 'create_async_client',
+        staticmethod(lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    )
+
+    return sent, failures
+
+
+def archive(api, *tickets):
+    api.tickets = {'Done': (
+        trello.Card(trello.ALL_DONE_TICKETS_CARD_ID, 'All', 0),
+        *tickets,
+    )}
+    asyncio.run(api.archive_done_cards())
+
+
+def test_archive_done_cards_deletes_commented_cards(api, trello_requests, capsys):
+    sent, _ = trello_requests
+
+    archive(api, trello.Card('2', 'T-2', 3), trello.Card('4', 'T-4', 5))
+
+    for card_id, name in (('2', 'T-2'), ('4', 'T-4')):
+        assert sent.index(('POST', name)) < sent.index(('DELETE', card_id))
+    assert len(sent) == 4
+    assert 'successfully archived' in capsys.readouterr().out
+
+
+def test_archive_done_cards_never_deletes_all_card(api, trello_requests):
+    sent, _ = trello_requests
+
+    archive(api, trello.Card('2', 'T-2', 3))
+
+    assert ('DELETE', trello.ALL_DONE_TICKETS_CARD_ID) not in sent
+    assert ('POST', 'All') not in sent
+
+
+def test_archive_done_cards_reports_failures(api, trello_requests, capsys):
+    sent, failures = trello_requests
+    failures[('POST', 'T-2')] = 500
+    failures[('DELETE', '4')] = 404
+
+    archive(api, trello.Card('2', 'T-2', 3), trello.Card('4', 'T-4', 5))
+
+    assert ('DELETE', '2') not in sent
+    output = capsys.readouterr().out
+    assert '  - T-2 - comment failed with 500 error' in output
+    assert '  - T-4 - comment added, delete failed with 404 error' in output
+    assert 'successfully archived' not in output
+
+
+def test_archive_done_cards_without_done_cards(api, trello_requests, capsys):
+    sent, _ = trello_requests
+
+    archive(api)
+
+    assert sent == []
+    assert 'no recently done cards' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('name, card', [
+    ('T-1 3', trello.Card('1', 'T-1', 3)),
+    ('T-1 - 3', trello.Card('1', 'T-1', 3)),
+    ('T-1 x', trello.Card('1', 'T-1', 0)),
+    ('T-1 ²', trello.Card('1', 'T-1', 0)),
+    ('5', trello.Card('1', '5', 0)),
+    ('   ', trello.Card('', '', 0)),
+    ('', trello.Card('', '', 0)),
+])
+def test_parse_card_name(name, card):
+    assert TrelloAPI.parse_card_name({'id': '1', 'name': name}) == card
+
+
+def test_move_card_updates_card_list(api):
+    api.tickets = {'In progress': (trello.Card('3', 'T-3', 2),)}
+    api._session.put.return_value = Mock(status_code=200)
+
+    assert api.move_card('T-3 2', 'Testing') == 200
+    api._session.put.assert_called_once_with(
+        url=f'{trello.URL}cards/3?{trello.CREDENTIALS}',
+        data={'idList': trello.TESTING_LIST_ID}
+    )
+    api._session.delete.assert_not_called()
+    api._session.post.assert_not_called()
+
+
+def test_get_card_id_tries_names_in_order(api):
+    api.tickets = {'Done': (
+        trello.Card('1', 'T-1', 0),
+        trello.Card('2', 'T-2', 0),
+    )}
+
+    assert api.get_card_id('T-1 3', 'T-1') == '1'
+    assert api.get_card_id('T-2', 'T-1') == '2'
+    assert api.get_card_id('T-9 1', 'T-9') == ''
+
+
+@pytest.mark.parametrize('day, week', [
+    # Monday uses previous week
+    (datetime.date(2026, 10, 12), 'Неделя 05.10.2026 - 09.10.2026'),
+    (datetime.date(2026, 10, 13), 'Неделя 12.10.2026 - 16.10.2026'),
+    (datetime.date(2026, 10, 18), 'Неделя 12.10.2026 - 16.10.2026'),
+])
+def test_get_week_for(day, week):
+    assert TrelloAPI.get_week_for(day.toordinal()) == week
+
+
+def test_get_week_uses_today():
+    today = datetime.date.today().toordinal()
+
+    assert TrelloAPI.get_week() == TrelloAPI.get_week_for(today)